@@ -8,17 +8,50 @@ import os
 import sys
 import threading
 import queue
-from pathlib import Path
+import multiprocessing
+import shelve
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional, List
 from dataclasses import dataclass
 from enum import Enum
-import uuid
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 from converter import convert_epub_to_pdf
 
+# Upper bound on simultaneous conversions (further capped by CPU count)
+MAX_WORKERS = 4
+
+# Image threads per conversion, so simultaneous conversions split the CPU cores
+IMAGE_WORKERS = max(1, (os.cpu_count() or 1) // min(os.cpu_count() or 1, MAX_WORKERS))
+
+# Run conversions in child processes so they are not serialized by the GIL
+USE_PROCESS_POOL = True
+
+# Render each PDF in memory and write it to disk in a single call
+BUFFER_PDF_OUTPUT = True
+
+# Remembers finished conversions so re-added, unchanged files are skipped
+CACHE_PATH = os.path.expanduser("~/Library/Caches/epub2pdf/cache.db")
+
+# How often queued progress updates are applied to the UI
+UPDATE_INTERVAL_MS = 50
+
+# Number of characters in the text progress bar of each queue row
+PROGRESS_BAR_WIDTH = 20
+
+# Maximum number of items waiting for a worker; the rest are held back
+TASK_QUEUE_SIZE = 64
+
+# Convert smaller files first so results appear sooner; False keeps add order
+SMALLEST_FIRST = True
+
+# Files added to the queue per main-loop iteration during bulk adds
+ADD_BATCH_SIZE = 16
+
 
 class ConversionStatus(Enum):
     PENDING = "pending"
@@ -29,26 +62,92 @@ class ConversionStatus(Enum):
 
 @dataclass
 class QueueItem:
-    id: str
+    id: int
     epub_path: str
     output_path: str
+    filename: str = ""
+    fingerprint: str = ""
+    size: int = 0
     status: ConversionStatus = ConversionStatus.PENDING
     progress: float = 0.0
     message: str = "Waiting..."
     error: Optional[str] = None
+
+
+def _write_pdf(output_path: str, pdf_bytes: bytes):
+    """Write a rendered PDF with one unbuffered write instead of many small ones"""
+    with open(output_path, "wb", buffering=0) as f:
+        view = memoryview(pdf_bytes)
+        while view:
+            view = view[f.write(view):]
+        # Keep large batches from crowding the page cache (not available on macOS)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _convert(epub_path: str, output_path: str, progress_callback):
+    """Convert one file, buffering the PDF in memory if BUFFER_PDF_OUTPUT is set"""
+    if BUFFER_PDF_OUTPUT:
+        pdf_bytes = convert_epub_to_pdf(
+            epub_path, None, progress_callback, bytes_out=True, image_workers=IMAGE_WORKERS
+        )
+        _write_pdf(output_path, pdf_bytes)
+    else:
+        convert_epub_to_pdf(epub_path, output_path, progress_callback, image_workers=IMAGE_WORKERS)
+
+
+def _warm_up():
+    """No-op task; running it makes a pool process start and import the converter"""
+
+
+def _run_conversion(epub_path: str, output_path: str, progress_queue):
+    """Convert in a child process, forwarding progress through a shared queue"""
+    def progress_callback(progress: float, message: str):
+        progress_queue.put((progress, message))
     
-    @property
-    def filename(self) -> str:
-        return Path(self.epub_path).name
+    _convert(epub_path, output_path, progress_callback)
+
+
+class ProcessPool:
+    """ProcessPoolExecutor that replaces itself once a child process dies"""
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        
+    def submit(self, fn, *args):
+        with self._lock:
+            executor = self._executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A crashed child (OOM kill, segfault) leaves the executor unusable
+            return self._replace(executor).submit(fn, *args)
+            
+    def _replace(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Swap in a fresh executor, unless another worker already has"""
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+        
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        with self._lock:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
 
 
 class ConversionWorker(threading.Thread):
     """Background worker for processing the conversion queue"""
     
-    def __init__(self, task_queue: queue.Queue, result_callback):
+    def __init__(self, task_queue: queue.Queue, result_callback,
+                 executor: Optional[ProcessPool] = None, progress_queue=None):
         super().__init__(daemon=True)
         self.task_queue = task_queue
         self.result_callback = result_callback
+        self.executor = executor
+        self.progress_queue = progress_queue
         self.running = True
         
     def stop(self):
@@ -57,7 +156,7 @@ class ConversionWorker(threading.Thread):
     def run(self):
         while self.running:
             try:
-                item = self.task_queue.get(timeout=0.5)
+                _, _, item = self.task_queue.get(timeout=0.5)
             except queue.Empty:
                 continue
                 
@@ -70,7 +169,10 @@ class ConversionWorker(threading.Thread):
                 def progress_callback(progress: float, message: str):
                     self.result_callback(item.id, ConversionStatus.CONVERTING, progress, message)
                 
-                convert_epub_to_pdf(item.epub_path, item.output_path, progress_callback)
+                if self.executor:
+                    self._convert_in_process(item)
+                else:
+                    _convert(item.epub_path, item.output_path, progress_callback)
                 self.result_callback(item.id, ConversionStatus.COMPLETED, 1.0, "Complete!")
                 
             except Exception as e:
@@ -78,94 +180,38 @@ class ConversionWorker(threading.Thread):
                 
             finally:
                 self.task_queue.task_done()
-
-
-class QueueItemWidget(ttk.Frame):
-    """Widget displaying a single queue item"""
-    
-    def __init__(self, parent, item: QueueItem, on_remove=None, **kwargs):
-        super().__init__(parent, **kwargs)
-        
-        self.item = item
-        self.on_remove = on_remove
-        
-        # Configure grid
-        self.columnconfigure(1, weight=1)
-        
-        # Status indicator (colored label)
-        self.status_label = ttk.Label(self, text="●", width=2)
-        self.status_label.grid(row=0, column=0, rowspan=2, padx=(10, 5), pady=10)
-        
-        # Filename
-        self.filename_label = ttk.Label(
-            self, 
-            text=item.filename,
-            font=('Helvetica', 13, 'bold')
-        )
-        self.filename_label.grid(row=0, column=1, padx=5, pady=(10, 2), sticky="w")
-        
-        # Progress frame
-        progress_frame = ttk.Frame(self)
-        progress_frame.grid(row=1, column=1, padx=5, pady=(2, 10), sticky="ew")
-        progress_frame.columnconfigure(0, weight=1)
-        
-        # Progress bar
-        self.progress_var = tk.DoubleVar(value=0)
-        self.progress_bar = ttk.Progressbar(
-            progress_frame, 
-            variable=self.progress_var,
-            maximum=1.0,
-            length=300
-        )
-        self.progress_bar.grid(row=0, column=0, sticky="ew", pady=(0, 4))
-        
-        # Status message
-        self.message_label = ttk.Label(
-            progress_frame,
-            text=item.message,
-            font=('Helvetica', 11)
-        )
-        self.message_label.grid(row=1, column=0, sticky="w")
-        
-        # Remove button
-        self.remove_btn = ttk.Button(
-            self,
-            text="✕",
-            width=3,
-            command=self._on_remove
+                
+    def _convert_in_process(self, item: "QueueItem"):
+        """Run a conversion on the process pool, relaying its progress"""
+        future = self.executor.submit(
+            _run_conversion, item.epub_path, item.output_path, self.progress_queue
         )
-        self.remove_btn.grid(row=0, column=2, rowspan=2, padx=10, pady=10)
-        
-        self.update_status(item.status, item.progress, item.message)
+        while True:
+            try:
+                progress, message = self.progress_queue.get(timeout=0.1)
+            except queue.Empty:
+                if future.done():
+                    break
+                continue
+            self.result_callback(item.id, ConversionStatus.CONVERTING, progress, message)
         
-    def _on_remove(self):
-        if self.on_remove:
-            self.on_remove(self.item.id)
-            
-    def update_status(self, status: ConversionStatus, progress: float, message: str):
-        """Update the visual state based on status"""
-        self.item.status = status
-        self.item.progress = progress
-        self.item.message = message
-        
-        self.progress_var.set(progress)
-        self.message_label.configure(text=message)
-        
-        # Update status indicator
-        status_symbols = {
-            ConversionStatus.PENDING: ("●", "gray"),
-            ConversionStatus.CONVERTING: ("●", "blue"),
-            ConversionStatus.COMPLETED: ("✓", "green"),
-            ConversionStatus.FAILED: ("✗", "red")
-        }
-        symbol, color = status_symbols.get(status, ("●", "gray"))
-        self.status_label.configure(text=symbol, foreground=color)
-        
-        # Enable/disable remove button
-        if status == ConversionStatus.CONVERTING:
-            self.remove_btn.configure(state="disabled")
-        else:
-            self.remove_btn.configure(state="normal")
+        # Raises the child's exception, if any
+        future.result()
+
+
+# Symbol and row color shown for each status in the queue
+STATUS_SYMBOLS = {
+    ConversionStatus.PENDING: ("●", "gray"),
+    ConversionStatus.CONVERTING: ("●", "blue"),
+    ConversionStatus.COMPLETED: ("✓", "green"),
+    ConversionStatus.FAILED: ("✗", "red")
+}
+
+
+def _progress_text(progress: float) -> str:
+    """Render progress (0-1) as a fixed-width text bar"""
+    filled = int(PROGRESS_BAR_WIDTH * progress)
+    return "█" * filled + "░" * (PROGRESS_BAR_WIDTH - filled)
 
 
 class EPUBtoPDFApp(tk.Tk):
@@ -179,14 +225,43 @@ class EPUBtoPDFApp(tk.Tk):
         self.minsize(600, 500)
         
         # Queue management
-        self.queue_items: dict[str, QueueItem] = {}
-        self.item_widgets: dict[str, QueueItemWidget] = {}
-        self.task_queue = queue.Queue()
+        self.queue_items: dict[int, QueueItem] = {}
+        self._next_id = 0
+        
+        # Entries are (priority, item id, item); the id keeps equal priorities in order
+        self.task_queue = queue.PriorityQueue(maxsize=TASK_QUEUE_SIZE)
         self.output_directory: Optional[str] = None
         
-        # Start worker thread
-        self.worker = ConversionWorker(self.task_queue, self._on_conversion_update)
-        self.worker.start()
+        # Paths still to be added, and items waiting for room in task_queue
+        self._pending_adds: deque = deque()
+        self._unsubmitted: deque = deque()
+        self._drain_scheduled = False
+        
+        # Number of queue items in each status, kept current on every transition
+        self._status_counts = {status: 0 for status in ConversionStatus}
+        
+        # Progress events from the workers, drained on the main thread
+        self.ui_events = queue.Queue()
+        
+        # Fingerprint -> (output path, size, mtime) of the PDF each completed conversion wrote
+        try:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            self.cache_db = shelve.open(CACHE_PATH)
+        except Exception:
+            self.cache_db = None  # Run without the cache rather than fail to start
+        
+        # Worker pool, grown on demand as files are queued
+        self.max_workers = min(os.cpu_count() or 1, MAX_WORKERS)
+        self.workers: List[ConversionWorker] = []
+        self.executor: Optional[ProcessPool] = None
+        self.manager = None
+        if USE_PROCESS_POOL:
+            self.executor = ProcessPool(self.max_workers)
+            self.manager = multiprocessing.Manager()
+            
+            # Start the pool processes now so the first conversion doesn't wait on them
+            for _ in range(self.max_workers):
+                self.executor.submit(_warm_up)
         
         self._setup_styles()
         self._create_ui()
@@ -194,6 +269,9 @@ class EPUBtoPDFApp(tk.Tk):
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self._on_close)
         
+        # Apply worker updates at a fixed rate
+        self.after(UPDATE_INTERVAL_MS, self._process_incoming)
+        
         # Center window
         self.update_idletasks()
         x = (self.winfo_screenwidth() - self.winfo_width()) // 2
@@ -204,6 +282,7 @@ class EPUBtoPDFApp(tk.Tk):
         """Setup ttk styles"""
         style = ttk.Style()
         style.theme_use('aqua')  # Use macOS native theme
+        style.configure("Queue.Treeview", rowheight=26)
         
     def _create_ui(self):
         """Create the user interface"""
@@ -212,7 +291,7 @@ class EPUBtoPDFApp(tk.Tk):
         main_frame = ttk.Frame(self, padding=20)
         main_frame.pack(fill="both", expand=True)
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(2, weight=1)
+        main_frame.rowconfigure(3, weight=1)
         
         # Header
         header_frame = ttk.Frame(main_frame)
@@ -263,7 +342,7 @@ class EPUBtoPDFApp(tk.Tk):
         
         # Queue section header
         queue_header = ttk.Frame(main_frame)
-        queue_header.grid(row=2, column=0, sticky="new", pady=(0, 10))
+        queue_header.grid(row=2, column=0, sticky="ew", pady=(0, 10))
         queue_header.columnconfigure(0, weight=1)
         
         queue_title = ttk.Label(
@@ -279,56 +358,67 @@ class EPUBtoPDFApp(tk.Tk):
         )
         self.queue_count_label.grid(row=0, column=1, padx=(0, 15))
         
+        # Remove button
+        self.remove_btn = ttk.Button(
+            queue_header,
+            text="Remove",
+            command=self._remove_selected
+        )
+        self.remove_btn.grid(row=0, column=2, padx=(0, 10))
+        
         # Clear button
         self.clear_btn = ttk.Button(
             queue_header,
             text="Clear Completed",
             command=self._clear_completed
         )
-        self.clear_btn.grid(row=0, column=2)
+        self.clear_btn.grid(row=0, column=3)
         
         # Scrollable queue container
         queue_container = ttk.Frame(main_frame)
-        queue_container.grid(row=2, column=0, sticky="nsew", pady=(40, 0))
+        queue_container.grid(row=3, column=0, sticky="nsew")
         queue_container.columnconfigure(0, weight=1)
         queue_container.rowconfigure(0, weight=1)
         
-        # Canvas for scrolling
-        self.queue_canvas = tk.Canvas(queue_container, highlightthickness=0)
-        scrollbar = ttk.Scrollbar(queue_container, orient="vertical", command=self.queue_canvas.yview)
-        
-        self.queue_scroll = ttk.Frame(self.queue_canvas)
-        self.queue_scroll.columnconfigure(0, weight=1)
-        
-        self.queue_scroll.bind(
-            "<Configure>",
-            lambda e: self.queue_canvas.configure(scrollregion=self.queue_canvas.bbox("all"))
+        # Queue list; Treeview only draws the rows in view
+        self.tree = ttk.Treeview(
+            queue_container,
+            columns=("status", "file", "progress", "message"),
+            show="headings",
+            style="Queue.Treeview"
         )
+        self.tree.heading("status", text="")
+        self.tree.heading("file", text="File", anchor="w")
+        self.tree.heading("progress", text="Progress", anchor="w")
+        self.tree.heading("message", text="Status", anchor="w")
+        self.tree.column("status", width=30, stretch=False, anchor="center")
+        self.tree.column("file", width=250)
+        self.tree.column("progress", width=170, stretch=False)
+        self.tree.column("message", width=200)
+        for status, (_, color) in STATUS_SYMBOLS.items():
+            self.tree.tag_configure(status.value, foreground=color)
+            
+        scrollbar = ttk.Scrollbar(queue_container, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
         
-        self.canvas_window = self.queue_canvas.create_window((0, 0), window=self.queue_scroll, anchor="nw")
-        self.queue_canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Make canvas resize with window
-        self.queue_canvas.bind('<Configure>', self._on_canvas_configure)
-        
-        self.queue_canvas.grid(row=0, column=0, sticky="nsew")
+        self.tree.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
         
-        # Mousewheel scrolling
-        self.queue_canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Delete>", lambda e: self._remove_selected())
+        self.tree.bind("<BackSpace>", lambda e: self._remove_selected())
         
         # Empty state
         self.empty_label = ttk.Label(
-            self.queue_scroll,
+            queue_container,
             text="No files in queue\n\nClick '+ Add EPUB Files' to get started",
             font=('Helvetica', 14),
             justify="center"
         )
-        self.empty_label.grid(row=0, column=0, pady=80)
+        self.empty_label.place(in_=self.tree, relx=0.5, y=80, anchor="n")
         
         # Footer with stats
         footer_frame = ttk.Frame(main_frame)
-        footer_frame.grid(row=3, column=0, sticky="ew", pady=(20, 0))
+        footer_frame.grid(row=4, column=0, sticky="ew", pady=(20, 0))
         footer_frame.columnconfigure(0, weight=1)
         
         self.stats_label = ttk.Label(
@@ -338,14 +428,6 @@ class EPUBtoPDFApp(tk.Tk):
         )
         self.stats_label.grid(row=0, column=0)
         
-    def _on_canvas_configure(self, event):
-        """Resize canvas window when canvas size changes"""
-        self.queue_canvas.itemconfig(self.canvas_window, width=event.width)
-        
-    def _on_mousewheel(self, event):
-        """Handle mousewheel scrolling"""
-        self.queue_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-        
     def _add_files(self):
         """Open file dialog to add EPUB files"""
         files = filedialog.askopenfilenames(
@@ -356,67 +438,149 @@ class EPUBtoPDFApp(tk.Tk):
             self._add_files_to_queue(list(files))
             
     def _add_files_to_queue(self, epub_paths: List[str]):
-        """Add files to the conversion queue"""
-        for epub_path in epub_paths:
-            if not os.path.exists(epub_path):
+        """Add files to the conversion queue in batches between UI events"""
+        self._pending_adds.extend(epub_paths)
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            self.after(1, self._drain_adds)
+            
+    def _drain_adds(self):
+        """Add the next batch of pending files and submit what fits"""
+        for _ in range(ADD_BATCH_SIZE):
+            if not self._pending_adds:
+                break
+            epub_path = self._pending_adds.popleft()
+            try:
+                st = os.stat(epub_path)
+            except OSError:
                 continue
+            fingerprint = self._fingerprint(epub_path, st)
                 
             # Determine output path
+            filename = os.path.basename(epub_path)
+            stem = os.path.splitext(filename)[0]
             if self.output_directory:
-                output_path = os.path.join(
-                    self.output_directory,
-                    Path(epub_path).stem + ".pdf"
-                )
+                output_path = os.path.join(self.output_directory, stem + ".pdf")
             else:
-                output_path = str(Path(epub_path).with_suffix('.pdf'))
+                output_path = os.path.splitext(epub_path)[0] + ".pdf"
                 
             # Create queue item
-            item_id = str(uuid.uuid4())
+            item_id = self._next_id
+            self._next_id += 1
             item = QueueItem(
                 id=item_id,
                 epub_path=epub_path,
-                output_path=output_path
+                output_path=output_path,
+                filename=filename,
+                fingerprint=fingerprint,
+                size=st.st_size
             )
             
+            # Unchanged input whose PDF from that conversion is still on disk, untouched
+            signature = self._cache_get(fingerprint)
+            if signature is not None and signature == self._output_signature(output_path):
+                item.status = ConversionStatus.COMPLETED
+                item.progress = 1.0
+                item.message = "Cached"
+            else:
+                self._unsubmitted.append(item)
+                
             self.queue_items[item_id] = item
-            self._create_item_widget(item)
-            self.task_queue.put(item)
+            self._status_counts[item.status] += 1
+            self.tree.insert(
+                "", "end", iid=str(item_id),
+                values=self._row_values(item), tags=(item.status.value,)
+            )
+            
+        # Hand items to the workers while the task queue has room
+        while self._unsubmitted:
+            item = self._unsubmitted[0]
+            if item.id in self.queue_items:
+                try:
+                    priority = item.size if SMALLEST_FIRST else 0
+                    self.task_queue.put_nowait((priority, item.id, item))
+                except queue.Full:
+                    break
+            self._unsubmitted.popleft()
             
+        self._start_workers()
         self._update_ui()
         
-    def _create_item_widget(self, item: QueueItem):
-        """Create a widget for a queue item"""
-        # Hide empty state
-        self.empty_label.grid_remove()
-        
-        widget = QueueItemWidget(
-            self.queue_scroll,
-            item,
-            on_remove=self._remove_item
-        )
-        widget.grid(row=len(self.item_widgets), column=0, sticky="ew", pady=(0, 5))
-        self.item_widgets[item.id] = widget
-        
-        # Update scroll region
-        self.queue_scroll.update_idletasks()
-        self.queue_canvas.configure(scrollregion=self.queue_canvas.bbox("all"))
-        
-    def _remove_item(self, item_id: str):
-        """Remove an item from the queue"""
-        if item_id in self.item_widgets:
-            self.item_widgets[item_id].destroy()
-            del self.item_widgets[item_id]
+        if self._pending_adds:
+            self.after(1, self._drain_adds)
+        elif self._unsubmitted:
+            self.after(UPDATE_INTERVAL_MS, self._drain_adds)
+        else:
+            self._drain_scheduled = False
+        
+    @staticmethod
+    def _fingerprint(epub_path: str, st: os.stat_result) -> str:
+        """Identify an input file by size, modification time and path"""
+        return f"{st.st_size}-{st.st_mtime_ns}-{epub_path}"
+        
+    @staticmethod
+    def _output_signature(output_path: str) -> Optional[tuple]:
+        """Identify a written PDF by path, size and modification time"""
+        try:
+            st = os.stat(output_path)
+        except OSError:
+            return None
+        return (output_path, st.st_size, st.st_mtime_ns)
+        
+    def _cache_get(self, fingerprint: str) -> Optional[tuple]:
+        """Return the cached output signature for an input, if any"""
+        if self.cache_db is None:
+            return None
+        try:
+            return self.cache_db.get(fingerprint)
+        except Exception:
+            return None  # Treat an unreadable cache as a miss
             
-        if item_id in self.queue_items:
-            del self.queue_items[item_id]
+    def _cache_put(self, item: QueueItem):
+        """Remember the PDF a completed conversion wrote"""
+        signature = self._output_signature(item.output_path)
+        if self.cache_db is None or signature is None:
+            return
+        try:
+            self.cache_db[item.fingerprint] = signature
+        except Exception:
+            pass  # A cache write failure must not stop UI updates
+        
+    def _start_workers(self):
+        """Start workers until there is one per queued file, up to the pool size"""
+        wanted = min(self.max_workers, len(self.workers) + self.task_queue.qsize())
+        while len(self.workers) < wanted:
+            progress_queue = self.manager.Queue() if self.manager else None
+            worker = ConversionWorker(
+                self.task_queue,
+                self._on_conversion_update,
+                executor=self.executor,
+                progress_queue=progress_queue
+            )
+            worker.start()
+            self.workers.append(worker)
+        
+    @staticmethod
+    def _row_values(item: QueueItem) -> tuple:
+        """Column values for an item's row in the queue list"""
+        symbol, _ = STATUS_SYMBOLS.get(item.status, ("●", "gray"))
+        return (symbol, item.filename, _progress_text(item.progress), item.message)
+        
+    def _remove_selected(self):
+        """Remove the selected items, except ones being converted"""
+        for iid in self.tree.selection():
+            self._remove_item(int(iid))
+            
+    def _remove_item(self, item_id: int):
+        """Remove an item from the queue"""
+        item = self.queue_items.get(item_id)
+        if item is None or item.status == ConversionStatus.CONVERTING:
+            return
             
-        self._reorder_widgets()
+        del self.queue_items[item_id]
+        self._status_counts[item.status] -= 1
+        self.tree.delete(str(item_id))
         self._update_ui()
-        
-    def _reorder_widgets(self):
-        """Reorder widget grid positions after removal"""
-        for idx, widget in enumerate(self.item_widgets.values()):
-            widget.grid(row=idx, column=0, sticky="ew", pady=(0, 5))
             
     def _clear_completed(self):
         """Clear completed and failed items from queue"""
@@ -425,7 +589,12 @@ class EPUBtoPDFApp(tk.Tk):
             if item.status in [ConversionStatus.COMPLETED, ConversionStatus.FAILED]
         ]
         for item_id in to_remove:
-            self._remove_item(item_id)
+            item = self.queue_items.pop(item_id)
+            self._status_counts[item.status] -= 1
+            
+        if to_remove:
+            self.tree.delete(*(str(item_id) for item_id in to_remove))
+            self._update_ui()
             
     def _select_output_dir(self):
         """Select output directory"""
@@ -437,35 +606,57 @@ class EPUBtoPDFApp(tk.Tk):
                 display_path = "..." + display_path[-32:]
             self.output_label.configure(text=f"Output: {display_path}")
             
-    def _on_conversion_update(self, item_id: str, status: ConversionStatus, 
+    def _on_conversion_update(self, item_id: int, status: ConversionStatus, 
                               progress: float, message: str):
         """Handle conversion progress updates from worker thread"""
-        self.after(0, lambda: self._update_item(item_id, status, progress, message))
-        
-    def _update_item(self, item_id: str, status: ConversionStatus, 
+        self.ui_events.put((item_id, status, progress, message))
+            
+    def _process_incoming(self):
+        """Drain worker events, apply the latest per item, then refresh once"""
+        updates = {}
+        try:
+            while True:
+                item_id, status, progress, message = self.ui_events.get_nowait()
+                updates[item_id] = (status, progress, message)
+        except queue.Empty:
+            pass
+        
+        try:
+            for item_id, (status, progress, message) in updates.items():
+                self._update_item(item_id, status, progress, message)
+            if updates:
+                self._update_ui()
+        finally:
+            # Keep polling even if one update fails, or every row would freeze
+            self.after(UPDATE_INTERVAL_MS, self._process_incoming)
+        
+    def _update_item(self, item_id: int, status: ConversionStatus, 
                      progress: float, message: str):
         """Update item state on main thread"""
-        if item_id in self.item_widgets:
-            self.item_widgets[item_id].update_status(status, progress, message)
+        item = self.queue_items.get(item_id)
+        if item is None:
+            return
+        if (status, progress, message) == (item.status, item.progress, item.message):
+            return
             
-        if item_id in self.queue_items:
-            self.queue_items[item_id].status = status
-            self.queue_items[item_id].progress = progress
-            self.queue_items[item_id].message = message
+        if item.status != status:
+            self._status_counts[item.status] -= 1
+            self._status_counts[status] += 1
+            if status == ConversionStatus.COMPLETED:
+                self._cache_put(item)
             
-        self._update_ui()
+        item.status = status
+        item.progress = progress
+        item.message = message
+        self.tree.item(str(item_id), values=self._row_values(item), tags=(status.value,))
         
     def _update_ui(self):
         """Update UI state"""
         total = len(self.queue_items)
-        completed = sum(1 for item in self.queue_items.values() 
-                       if item.status == ConversionStatus.COMPLETED)
-        failed = sum(1 for item in self.queue_items.values() 
-                    if item.status == ConversionStatus.FAILED)
-        converting = sum(1 for item in self.queue_items.values() 
-                        if item.status == ConversionStatus.CONVERTING)
-        pending = sum(1 for item in self.queue_items.values() 
-                     if item.status == ConversionStatus.PENDING)
+        completed = self._status_counts[ConversionStatus.COMPLETED]
+        failed = self._status_counts[ConversionStatus.FAILED]
+        converting = self._status_counts[ConversionStatus.CONVERTING]
+        pending = self._status_counts[ConversionStatus.PENDING]
         
         self.queue_count_label.configure(text=f"{total} file{'s' if total != 1 else ''}")
         
@@ -483,13 +674,26 @@ class EPUBtoPDFApp(tk.Tk):
         else:
             self.stats_label.configure(text="Ready")
             
-        if not self.queue_items:
-            self.empty_label.grid()
+        if self.queue_items:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(in_=self.tree, relx=0.5, y=80, anchor="n")
             
     def _on_close(self):
         """Handle window close"""
-        self.worker.stop()
-        self.task_queue.put(None)
+        for seq, worker in enumerate(self.workers):
+            worker.stop()
+            try:
+                # Sorts ahead of any real work
+                self.task_queue.put_nowait((-1, seq, None))
+            except queue.Full:
+                pass
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.manager:
+            self.manager.shutdown()
+        if self.cache_db is not None:
+            self.cache_db.close()
         self.destroy()
 
 
@@ -1,27 +1,185 @@
 """
 EPUB to PDF Converter - Core conversion logic
 """
+import hashlib
+import mmap
 import os
 import re
-import base64
 import tempfile
+import threading
+from html import escape
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Optional
-from urllib.parse import unquote
+from typing import Callable, ClassVar, Optional, Union
+from urllib.parse import quote, unquote
 
 import ebooklib
 from ebooklib import epub
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+from lxml.etree import ParserError
 from weasyprint import HTML, CSS
-from PIL import Image
+
+try:
+    from weasyprint.urls import URLFetcher, URLFetcherResponse
+except ImportError:  # Older WeasyPrint only takes function url_fetchers
+    from weasyprint import default_url_fetcher
+    URLFetcher = None
+from PIL import Image, ImageFile
 import io
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Embed what decodes from truncated images instead of failing them. Decompression
+# bombs are left to Pillow's default MAX_IMAGE_PIXELS, which WeasyPrint shares
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+# Image src prefix resolved by EPUBConverter's url_fetcher instead of the network
+IMAGE_URL_PREFIX = 'epub-img:///'
+
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.svg': 'image/svg+xml',
+    '.webp': 'image/webp'
+}
+
+
+# JPEG encode buffer reused by each image thread
+_encode_buffers = threading.local()
+
+def _content_key(img_name: str, img_data: bytes) -> tuple:
+    """Return a cache key for an image's content (the extension picks the mime type)"""
+    if xxhash is not None:
+        digest = xxhash.xxh3_128_digest(img_data)
+    else:
+        digest = hashlib.blake2b(img_data, digest_size=16).digest()
+    return digest, Path(img_name).suffix.lower()
+
+
+def _optimize_image(img_name: str, img_data: bytes) -> tuple:
+    """Shrink and re-encode one image for the PDF, returning (name, bytes, mime type)"""
+    img_ext = Path(img_name).suffix.lower()
+    mime_type = MIME_TYPES.get(img_ext, 'image/png')
+    
+    # Try to optimize large images
+    if img_ext in ['.jpg', '.jpeg', '.png', '.webp']:
+        try:
+            img = Image.open(io.BytesIO(img_data))
+            original_width = img.width
+            # Let libjpeg decode large JPEGs at a reduced scale, keeping width >= 1200
+            # (no-op for other formats); img.size reflects the draft afterwards
+            img.draft('RGB', (1200, 1))
+            
+            # Already a small JPEG: embed the original bytes (pixels are never decoded).
+            # Check the stored width, since draft() can shrink e.g. 2400px down to exactly 1200px
+            if img_ext in ('.jpg', '.jpeg') and original_width <= 1200 and img.mode in ('RGB', 'L'):
+                return img_name, img_data, mime_type
+            
+            # Convert to RGB/L if necessary; reduce() doesn't support palette or 1-bit images
+            if img.mode in ('RGBA', 'P'):
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode == 'P':
+                    img = img.convert('RGBA')
+                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+                img = background
+            elif img.mode == '1':
+                img = img.convert('L')
+            
+            # Cheap integer downscale first so LANCZOS runs on a smaller image
+            factor = img.width // 1200
+            if factor > 1:
+                img = img.reduce(factor)
+            
+            # Resize in place if too large (max 1200px width for PDF), keeping aspect ratio
+            img.thumbnail((1200, 1000000), Image.LANCZOS)
+            
+            buffer = getattr(_encode_buffers, 'buffer', None)
+            if buffer is None:
+                buffer = _encode_buffers.buffer = io.BytesIO()
+            buffer.seek(0)
+            buffer.truncate(0)
+            # Single-pass baseline 4:2:0 encode (libjpeg-turbo's SIMD path in Pillow wheels)
+            img.save(buffer, format='JPEG', quality=85, optimize=False, progressive=False, subsampling=2)
+            img_data = buffer.getvalue()
+            mime_type = 'image/jpeg'
+        except Exception:
+            pass  # Use original image if optimization fails
+    
+    return img_name, img_data, mime_type
+
+
+if URLFetcher is not None:
+    class _ImageURLFetcher(URLFetcher):
+        """WeasyPrint URL fetcher serving extracted EPUB images from memory"""
+        
+        def __init__(self, images: dict, **kwargs):
+            super().__init__(**kwargs)
+            self.images = images
+            
+        def fetch(self, url, headers=None):
+            if url.startswith(IMAGE_URL_PREFIX):
+                img_data, mime_type = self.images[unquote(url[len(IMAGE_URL_PREFIX):])]
+                return URLFetcherResponse(url, body=img_data, headers={'Content-Type': mime_type})
+            return super().fetch(url, headers)
+
+
+def _normpath(path: str) -> str:
+    """Collapse '.', '..' and empty segments of a '/'-separated EPUB path"""
+    parts = []
+    for part in path.split('/'):
+        if part == '..':
+            if parts:
+                parts.pop()
+        elif part and part != '.':
+            parts.append(part)
+    return '/'.join(parts)
+
+
+class _MappedFile(mmap.mmap):
+    """Read-only memory map usable as the file object zipfile expects"""
+    
+    def seekable(self) -> bool:
+        return True
+
+
+def _read_epub(epub_path: str) -> epub.EpubBook:
+    """Read an EPUB through a memory map of the file instead of buffered reads"""
+    with open(epub_path, 'rb') as f:
+        try:
+            mapped = _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files can't be mapped; let ebooklib report them as usual
+            return epub.read_epub(epub_path)
+        # ebooklib reads every item while loading, so the map can be closed right after
+        with mapped:
+            return epub.read_epub(mapped)
+
+
+def _inner_html(element) -> str:
+    """Serialize the contents of an lxml element without the element's own tag"""
+    text = escape(element.text, quote=False) if element.text else ''
+    return text + ''.join(lxml_html.tostring(child, encoding='unicode') for child in element)
+
 
 class EPUBConverter:
     """Handles conversion of EPUB files to PDF"""
     
-    def __init__(self, progress_callback: Optional[Callable[[float, str], None]] = None):
+    # Parsed base stylesheet, shared by every conversion in this process
+    _BASE_CSS: ClassVar[Optional[CSS]] = None
+    
+    def __init__(self, progress_callback: Optional[Callable[[float, str], None]] = None,
+                 image_workers: Optional[int] = None):
         self.progress_callback = progress_callback
+        # Threads for image optimization; callers running several conversions at once pass a share
+        self.image_workers = image_workers or os.cpu_count() or 1
+        # lxml parsers are not thread-safe, so each converter gets its own
+        self._html_parser = lxml_html.HTMLParser(encoding='utf-8')
         
     def _report_progress(self, progress: float, message: str):
         """Report progress to callback if available"""
@@ -29,98 +187,160 @@ class EPUBConverter:
             self.progress_callback(progress, message)
     
     def _extract_images(self, book: epub.EpubBook) -> dict:
-        """Extract all images from EPUB and return as base64 encoded dict"""
-        images = {}
+        """Extract all images from EPUB as a dict of name -> (bytes, mime type)"""
+        names = []
+        tasks = {}
         for item in book.get_items():
             if item.get_type() == ebooklib.ITEM_IMAGE:
-                img_name = item.get_name()
-                img_data = item.get_content()
-                
-                # Convert image to base64 for embedding
-                img_ext = Path(img_name).suffix.lower()
-                mime_types = {
-                    '.jpg': 'image/jpeg',
-                    '.jpeg': 'image/jpeg',
-                    '.png': 'image/png',
-                    '.gif': 'image/gif',
-                    '.svg': 'image/svg+xml',
-                    '.webp': 'image/webp'
-                }
-                mime_type = mime_types.get(img_ext, 'image/png')
-                
-                # Try to optimize large images
-                if img_ext in ['.jpg', '.jpeg', '.png', '.webp']:
-                    try:
-                        img = Image.open(io.BytesIO(img_data))
-                        # Resize if too large (max 1200px width for PDF)
-                        if img.width > 1200:
-                            ratio = 1200 / img.width
-                            new_size = (1200, int(img.height * ratio))
-                            img = img.resize(new_size, Image.LANCZOS)
-                        
-                        # Convert to RGB if necessary
-                        if img.mode in ('RGBA', 'P'):
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode == 'P':
-                                img = img.convert('RGBA')
-                            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                            img = background
-                        
-                        buffer = io.BytesIO()
-                        img.save(buffer, format='JPEG', quality=85)
-                        img_data = buffer.getvalue()
-                        mime_type = 'image/jpeg'
-                    except Exception:
-                        pass  # Use original image if optimization fails
-                
-                b64_data = base64.b64encode(img_data).decode('utf-8')
-                data_uri = f"data:{mime_type};base64,{b64_data}"
-                
-                # Store with various path formats for matching
-                images[img_name] = data_uri
-                images[os.path.basename(img_name)] = data_uri
-                # Handle URL-encoded paths
-                images[unquote(img_name)] = data_uri
-                images[unquote(os.path.basename(img_name))] = data_uri
-                
+                img_name, img_data = item.get_name(), item.get_content()
+                key = _content_key(img_name, img_data)
+                names.append((img_name, key))
+                # Duplicate art (ornaments, repeated logos) is only optimized once per book
+                if key not in tasks:
+                    tasks[key] = (img_name, img_data)
+        
+        # Pillow releases the GIL while decoding, resizing and encoding
+        if len(tasks) > 2 and self.image_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.image_workers) as executor:
+                results = list(executor.map(lambda task: _optimize_image(*task), tasks.values()))
+        else:
+            results = [_optimize_image(*task) for task in tasks.values()]
+        
+        resolved = {key: (img_data, mime_type) for key, (_, img_data, mime_type) in zip(tasks, results)}
+        
+        images = {}
+        for img_name, key in names:
+            image = resolved[key]
+            
+            # Store under normalized full path and basename (see _find_image_key)
+            key = unquote(img_name).lower()
+            images[key] = image
+            images[key.rpartition('/')[2]] = image
+            
         return images
     
-    def _process_html_content(self, html_content: str, images: dict, base_path: str = "") -> str:
-        """Process HTML content - fix image references and clean up"""
-        soup = BeautifulSoup(html_content, 'lxml')
+    def _parse_html(self, html_content: bytes):
+        """Parse raw HTML/XHTML bytes, or return None if the document is empty"""
+        if not html_content.strip():
+            return None
+        # Parse the raw bytes directly; the parser treats them as UTF-8, the EPUB default
+        try:
+            return lxml_html.document_fromstring(html_content, parser=self._html_parser)
+        except ParserError:
+            return None  # Nothing but an XML declaration and/or comments
+    
+    def _find_image_key(self, src: str, images: dict, base_path: str) -> Optional[str]:
+        """Return the images key for an <img> src, or None if it isn't in the EPUB"""
+        src = unquote(src).lower()
+        
+        # Resolve against the chapter's own location first, it is the most specific
+        # (EPUB paths are always '/'-separated, so os.path is not needed)
+        if base_path:
+            base_dir = base_path.lower().rpartition('/')[0]
+            key = _normpath(f"{base_dir}/{src}" if base_dir else src)
+            if key in images:
+                return key
         
-        # Process all images
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
+        key = src.lstrip('./')
+        if key in images:
+            return key
+        
+        key = key.rpartition('/')[2]
+        if key in images:
+            return key
+        return None
+    
+    def _process_html_content(self, html_content: bytes, images: dict, base_path: str = "") -> str:
+        """Process HTML content - fix image references and clean up, returning the body's inner HTML"""
+        tree = self._parse_html(html_content)
+        if tree is None:
+            return ''
+        
+        # Process all images; chapters often repeat the same src, so resolve each once
+        rewritten = {}
+        find_image_key = self._find_image_key
+        for img in tree.iter('img'):
+            src = img.get('src')
             if not src:
                 continue
-                
-            # Try various path combinations to find the image
-            src_variants = [
-                src,
-                unquote(src),
-                os.path.basename(src),
-                os.path.basename(unquote(src)),
-            ]
             
-            if base_path:
-                src_variants.extend([
-                    os.path.normpath(os.path.join(os.path.dirname(base_path), src)),
-                    os.path.normpath(os.path.join(os.path.dirname(base_path), unquote(src))),
-                ])
+            new_src = rewritten.get(src)
+            if new_src is None:
+                key = find_image_key(src, images, base_path)
+                new_src = rewritten[src] = IMAGE_URL_PREFIX + quote(key) if key is not None else src
+            img.set('src', new_src)
+        
+        # Remove scripts (drop_tree keeps any text following them)
+        for script in list(tree.iter('script')):
+            script.drop_tree()
+        
+        body = tree.find('body')
+        if body is not None:
+            return _inner_html(body)
+        return lxml_html.tostring(tree, encoding='unicode')
+    
+    def _make_url_fetcher(self, images: dict) -> Callable:
+        """Return a WeasyPrint url_fetcher serving extracted images from memory"""
+        if URLFetcher is not None:
+            return _ImageURLFetcher(images)
+        
+        def fetcher(url: str, *args, **kwargs) -> dict:
+            if url.startswith(IMAGE_URL_PREFIX):
+                img_data, mime_type = images[unquote(url[len(IMAGE_URL_PREFIX):])]
+                return {'string': img_data, 'mime_type': mime_type}
+            return default_url_fetcher(url, *args, **kwargs)
+        return fetcher
+    
+    def _render_document(self, title: str, body_html: str, stylesheets: list,
+                         url_fetcher: Callable, page_offset: int):
+        """Render one standalone HTML document, numbering its pages after page_offset"""
+        html = f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>{title}</title>
+        </head>
+        <body>
+            {body_html}
+        </body>
+        </html>
+        '''
+        # Each document starts its own page counter; continue from the previous ones
+        numbering = CSS(string=f'@page :first {{ counter-reset: page {page_offset + 1}; }}')
+        return HTML(string=html, url_fetcher=url_fetcher).render(stylesheets=stylesheets + [numbering])
+    
+    def _iter_chapter_docs(self, book: epub.EpubBook, images: dict, title: str, author: str,
+                           stylesheets: list, url_fetcher: Callable):
+        """Yield the rendered title page, then each spine chapter in reading order"""
+        title_html = f'''
+        <div class="title-page">
+            <h1>{title}</h1>
+            {f'<p class="author">{author}</p>' if author else ''}
+        </div>
+        '''
+        document = self._render_document(title, title_html, stylesheets, url_fetcher, 0)
+        page_count = len(document.pages)
+        yield document
+        
+        # Walk the spine lazily so only the current chapter's HTML is alive
+        total_items = len(book.spine)
+        for idx, (item_id, linear) in enumerate(book.spine):
+            item = book.get_item_with_id(item_id)
+            if item is None or item.get_type() != ebooklib.ITEM_DOCUMENT:
+                continue
+            
+            progress = 0.2 + (0.65 * (idx / max(total_items, 1)))
+            self._report_progress(progress, f"Processing chapter {idx + 1} of {total_items}...")
             
-            for variant in src_variants:
-                # Clean up path
-                variant = variant.lstrip('./')
-                if variant in images:
-                    img['src'] = images[variant]
-                    break
-        
-        # Remove scripts
-        for script in soup.find_all('script'):
-            script.decompose()
+            content = item.get_content()
+            processed = self._process_html_content(content, images, item.get_name())
+            chapter_html = f'<div class="chapter">{processed}</div>'
+            del content, processed
             
-        return str(soup)
+            document = self._render_document(title, chapter_html, stylesheets, url_fetcher, page_count)
+            page_count += len(document.pages)
+            yield document
     
     def _get_base_css(self) -> str:
         """Return base CSS for PDF styling"""
@@ -291,22 +511,24 @@ class EPUBConverter:
         }
         """
     
-    def convert(self, epub_path: str, output_path: str) -> bool:
+    def convert(self, epub_path: str, output_path: Optional[str],
+                bytes_out: bool = False) -> Union[bool, bytes]:
         """
         Convert an EPUB file to PDF
         
         Args:
             epub_path: Path to the input EPUB file
-            output_path: Path for the output PDF file
+            output_path: Path for the output PDF file (ignored if bytes_out)
+            bytes_out: Return the PDF as bytes instead of writing a file
             
         Returns:
-            True if conversion successful, False otherwise
+            The PDF bytes if bytes_out, else True if conversion successful
         """
         try:
             self._report_progress(0.0, "Opening EPUB file...")
             
             # Read the EPUB file
-            book = epub.read_epub(epub_path)
+            book = _read_epub(epub_path)
             
             self._report_progress(0.1, "Extracting images...")
             
@@ -322,65 +544,34 @@ class EPUBConverter:
             creator = book.get_metadata('DC', 'creator')
             author = creator[0][0] if creator else ""
             
-            # Build combined HTML
-            html_parts = []
-            
-            # Title page
-            html_parts.append(f'''
-            <div class="title-page">
-                <h1>{title}</h1>
-                {f'<p class="author">{author}</p>' if author else ''}
-            </div>
-            ''')
-            
-            # Get spine items (reading order)
-            spine_items = []
-            for item_id, linear in book.spine:
-                item = book.get_item_with_id(item_id)
-                if item:
-                    spine_items.append(item)
+            # Metadata is interpolated into HTML below, so escape it once here
+            title, author = escape(title), escape(author)
             
-            # Process each chapter/document
-            total_items = len(spine_items)
-            for idx, item in enumerate(spine_items):
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    progress = 0.2 + (0.5 * (idx / max(total_items, 1)))
-                    self._report_progress(progress, f"Processing chapter {idx + 1} of {total_items}...")
-                    
-                    content = item.get_content().decode('utf-8', errors='ignore')
-                    processed = self._process_html_content(content, images, item.get_name())
-                    
-                    # Extract body content
-                    soup = BeautifulSoup(processed, 'lxml')
-                    body = soup.find('body')
-                    if body:
-                        html_parts.append(f'<div class="chapter">{body.decode_contents()}</div>')
-                    else:
-                        html_parts.append(f'<div class="chapter">{processed}</div>')
+            if EPUBConverter._BASE_CSS is None:
+                EPUBConverter._BASE_CSS = CSS(string=self._get_base_css())
+            stylesheets = [EPUBConverter._BASE_CSS]
+            url_fetcher = self._make_url_fetcher(images)
             
-            self._report_progress(0.7, "Generating PDF...")
+            # Keep only the rendered pages; each chapter's HTML is freed as soon as it is laid out
+            first_document = None
+            pages = []
+            for document in self._iter_chapter_docs(book, images, title, author, stylesheets, url_fetcher):
+                if first_document is None:
+                    first_document = document
+                pages.extend(document.pages)
             
-            # Combine into full HTML document
-            full_html = f'''
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>{title}</title>
-            </head>
-            <body>
-                {''.join(html_parts)}
-            </body>
-            </html>
-            '''
+            # Combine all rendered pages into one PDF
+            pdf_doc = first_document.copy(pages)
             
-            # Generate PDF
-            html_doc = HTML(string=full_html)
-            css = CSS(string=self._get_base_css())
+            if bytes_out:
+                self._report_progress(0.85, "Rendering PDF...")
+                pdf_bytes = pdf_doc.write_pdf()
+                self._report_progress(1.0, "Complete!")
+                return pdf_bytes
             
             self._report_progress(0.85, "Writing PDF file...")
             
-            html_doc.write_pdf(output_path, stylesheets=[css])
+            pdf_doc.write_pdf(output_path)
             
             self._report_progress(1.0, "Complete!")
             
@@ -391,19 +582,22 @@ class EPUBConverter:
             raise
 
 
-def convert_epub_to_pdf(epub_path: str, output_path: str, 
-                        progress_callback: Optional[Callable[[float, str], None]] = None) -> bool:
+def convert_epub_to_pdf(epub_path: str, output_path: Optional[str], 
+                        progress_callback: Optional[Callable[[float, str], None]] = None,
+                        bytes_out: bool = False, image_workers: Optional[int] = None) -> Union[bool, bytes]:
     """
     Convenience function to convert EPUB to PDF
     
     Args:
         epub_path: Path to input EPUB
-        output_path: Path for output PDF
+        output_path: Path for output PDF (ignored if bytes_out)
         progress_callback: Optional callback for progress updates (progress: 0-1, message: str)
+        bytes_out: Return the PDF as bytes instead of writing output_path
+        image_workers: Threads for image optimization (defaults to the CPU count)
         
     Returns:
-        True if successful
+        The PDF bytes if bytes_out, else True if successful
     """
-    converter = EPUBConverter(progress_callback)
-    return converter.convert(epub_path, output_path)
+    converter = EPUBConverter(progress_callback, image_workers=image_workers)
+    return converter.convert(epub_path, output_path, bytes_out=bytes_out)
 
@@ -107,7 +107,7 @@ else
     if ! $PYTHON -c "import ebooklib, weasyprint" 2>/dev/null; then
         osascript -e 'display notification "Setting up environment..." with title "EPUB to PDF Converter"'
         $PYTHON -m venv "$RESOURCES/venv"
-        "$RESOURCES/venv/bin/pip" install --quiet ebooklib weasyprint beautifulsoup4 lxml Pillow
+        "$RESOURCES/venv/bin/pip" install --quiet ebooklib weasyprint lxml Pillow
         PYTHON="$RESOURCES/venv/bin/python"
     fi
 fi